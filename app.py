@@ -11,18 +11,27 @@ Usage:
     streamlit run app.py
 """
 
+import hashlib
 import io
 import json
+import math
 import os
 import random
+import shutil
+import tempfile
 import uuid
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 
+import numpy as np
 import pandas as pd
-import qrcode
 import streamlit as st
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # --- Configuration ---
 APP_TITLE = "Prioritizer"
@@ -40,9 +49,20 @@ STRATEGY_LABELS = {
     STRATEGY_SWISS: "Swiss rounds (batch-style)",
 }
 
+# Elo expected score uses 10 ** (diff / 400) == exp(diff * ln(10) / 400)
+ELO_K = 32
+ELO_BATCH_SIZE = 3  # Elo matches shown per form submit (one rerun per batch)
+_LN10_OVER_400 = math.log(10) / 400
+
+@st.cache_resource(show_spinner=False)
+def _make_sessions_dir(path: Path) -> Path:
+    """Create the sessions directory once per server process instead of on every rerun."""
+    path.mkdir(exist_ok=True)
+    return path
+
+
 # Sessions directory
-SESSIONS_DIR = Path(__file__).parent / "sessions"
-SESSIONS_DIR.mkdir(exist_ok=True)
+SESSIONS_DIR = _make_sessions_dir(Path(__file__).parent / "sessions")
 
 
 # --- Debug Helper ---
@@ -54,6 +74,24 @@ def debug(msg: str):
         st.session_state.debug_log.append(msg)
 
 
+# --- JSON Helpers ---
+def _json_dumps(data: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY, default=str)
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _json_loads(raw: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # Older files may contain NaN, which only the stdlib parser accepts
+    return json.loads(raw)
+
+
 # --- Session Management ---
 def create_session(name: str, strategy: str, df: pd.DataFrame,
                    id_col: str, name_col: str, desc_col: str,
@@ -74,46 +112,126 @@ def create_session(name: str, strategy: str, df: pd.DataFrame,
         "users": {},  # username -> {ordering: [...], completed: bool, ...}
         "expected_users": [],  # Optional list of expected usernames
     }
-    session_path = SESSIONS_DIR / f"{session_id}.json"
-    with open(session_path, "w", encoding="utf-8") as f:
-        json.dump(session_data, f, indent=2, default=str)
+    _atomic_write_json(SESSIONS_DIR / f"{session_id}.json", session_data)
     return session_id
 
 
+def _user_results_dir(session_id: str) -> Path:
+    """Directory holding one result file per user of a session."""
+    return SESSIONS_DIR / session_id / "users"
+
+
+def _user_result_path(session_id: str, username: str) -> Path:
+    """Result file for a user (usernames are hashed so any name is filename-safe)."""
+    digest = hashlib.sha1(username.encode("utf-8")).hexdigest()
+    return _user_results_dir(session_id) / f"{digest}.json"
+
+
+def _atomic_write_json(path: Path, data: Dict):
+    """Write JSON via a temp file in the same directory and os.replace it into place.
+
+    No fsync: a crash can lose the latest write but never leaves a half-written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_json_dumps(data))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _session_signature(session_id: str, doc_mtime: Optional[int] = None) -> Tuple[int, int]:
+    """(session file mtime, users dir mtime) - changes whenever the session or a result is written."""
+    if doc_mtime is None:
+        doc_mtime = (SESSIONS_DIR / f"{session_id}.json").stat().st_mtime_ns
+    try:
+        users_mtime = _user_results_dir(session_id).stat().st_mtime_ns
+    except FileNotFoundError:
+        users_mtime = 0
+    return doc_mtime, users_mtime
+
+
 def load_session(session_id: str) -> Optional[Dict]:
-    """Load a session by ID."""
+    """Load a session by ID, merging in per-user result files."""
     session_path = SESSIONS_DIR / f"{session_id}.json"
     if not session_path.exists():
         return None
-    with open(session_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(session_path, "rb") as f:
+        session = _json_loads(f.read())
+
+    # Results saved by save_user_result live next to the session document
+    users_dir = _user_results_dir(session_id)
+    if users_dir.is_dir():
+        for path in users_dir.glob("*.json"):
+            with open(path, "rb") as f:
+                entry = _json_loads(f.read())
+            session["users"][entry["username"]] = entry["result"]
+    return session
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _load_session_shared(session_id: str, signature: Tuple[int, int]) -> Optional[Dict]:
+    """load_session(), cached until the session or one of its results is written."""
+    return load_session(session_id)
+
+
+def get_session(session_id: str) -> Optional[Dict]:
+    """Load a session through a cache shared by all browser sessions.
+
+    The dict is not copied per caller, so treat it as read-only.
+    """
+    try:
+        signature = _session_signature(session_id)
+    except FileNotFoundError:
+        return None
+    return _load_session_shared(session_id, signature)
 
 
 def save_session(session_data: Dict):
     """Save session data back to file."""
-    session_id = session_data["id"]
-    session_path = SESSIONS_DIR / f"{session_id}.json"
-    with open(session_path, "w", encoding="utf-8") as f:
-        json.dump(session_data, f, indent=2, default=str)
+    _atomic_write_json(SESSIONS_DIR / f"{session_data['id']}.json", session_data)
+
+
+@st.cache_data(show_spinner=False, max_entries=1000)
+def _read_session_summary(session_id: str, signature: Tuple[int, int]) -> Dict:
+    """Load a session and keep only the fields shown in session lists.
+
+    Cached on the session's signature, so unchanged sessions cost a couple of stat() calls per rerun.
+    """
+    data = load_session(session_id)
+    return {
+        "id": data["id"],
+        "name": data["name"],
+        "strategy": data["strategy"],
+        "items_count": len(data["data"]),
+        "users_completed": sum(1 for u in data["users"].values() if u.get("completed")),
+        "users_total": len(data["users"]),
+    }
 
 
 def list_sessions() -> List[Dict]:
     """List all available sessions with basic info."""
     sessions = []
-    for path in SESSIONS_DIR.glob("*.json"):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                sessions.append({
-                    "id": data["id"],
-                    "name": data["name"],
-                    "strategy": data["strategy"],
-                    "items_count": len(data["data"]),
-                    "users_completed": sum(1 for u in data["users"].values() if u.get("completed")),
-                    "users_total": len(data["users"]),
-                })
-        except Exception:
-            continue
+    # scandir entries carry the file type from readdir, so only the mtime needs a stat()
+    try:
+        it = os.scandir(SESSIONS_DIR)
+    except FileNotFoundError:
+        # Removed while the server runs; the next session write recreates it
+        return sessions
+    with it:
+        for entry in it:
+            if not entry.name.endswith(".json") or not entry.is_file(follow_symlinks=False):
+                continue
+            session_id = entry.name[:-len(".json")]
+            try:
+                signature = _session_signature(session_id, entry.stat().st_mtime_ns)
+                sessions.append(_read_session_summary(session_id, signature))
+            except Exception:
+                continue
     return sessions
 
 
@@ -122,15 +240,19 @@ def delete_session(session_id: str) -> bool:
     session_path = SESSIONS_DIR / f"{session_id}.json"
     if session_path.exists():
         session_path.unlink()
+        shutil.rmtree(SESSIONS_DIR / session_id, ignore_errors=True)
         return True
     return False
 
 
 def save_user_result(session_id: str, username: str, ordering: List[int],
                      extra_data: Optional[Dict] = None):
-    """Save a user's ranking result to the session."""
-    session = load_session(session_id)
-    if session is None:
+    """Save a user's ranking result to the session.
+
+    Only the user's own result file is written; the session document is left untouched.
+    """
+    session_path = SESSIONS_DIR / f"{session_id}.json"
+    if not session_path.exists():
         return False
 
     user_data = {
@@ -140,71 +262,141 @@ def save_user_result(session_id: str, username: str, ordering: List[int],
     if extra_data:
         user_data.update(extra_data)
 
-    session["users"][username] = user_data
-    save_session(session)
+    _atomic_write_json(_user_result_path(session_id, username),
+                       {"username": username, "result": user_data})
     return True
 
 
-def compute_average_ranking(session: Dict) -> pd.DataFrame:
-    """Compute average ranking from all user results."""
-    df = pd.DataFrame(session["data"])
+@st.cache_data(show_spinner=False, max_entries=32)
+def _load_items_df(session_id: str, mtime_ns: int) -> pd.DataFrame:
+    """Build the items DataFrame of a session, cached until the session file changes."""
+    return pd.DataFrame(load_session(session_id)["data"])
+
+
+def load_items_df(session_id: str) -> Optional[pd.DataFrame]:
+    """Load a session's items as a DataFrame without re-inferring dtypes on every rerun."""
+    session_path = SESSIONS_DIR / f"{session_id}.json"
+    if not session_path.exists():
+        return None
+    return _load_items_df(session_id, session_path.stat().st_mtime_ns)
+
+
+def _ranks_from_orderings(orderings: List[List[int]], n_items: int) -> np.ndarray:
+    """Convert orderings (item indices, best first) into a (users, items) array of 1-based ranks."""
+    order_arr = np.asarray(orderings, dtype=np.int32).reshape(len(orderings), n_items)
+    ranks = np.empty_like(order_arr)
+    rows = np.arange(order_arr.shape[0])[:, None]
+    ranks[rows, order_arr] = np.arange(1, n_items + 1, dtype=np.int32)
+    return ranks
+
+
+def compute_average_ranking(session: Dict, items_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Compute average ranking from all user results.
+
+    Pass items_df (e.g. from load_items_df) to skip rebuilding it from session["data"].
+    """
+    df = pd.DataFrame(session["data"]) if items_df is None else items_df
     n_items = len(df)
 
-    # Collect all user rankings
-    user_rankings = {}
-    for username, user_data in session["users"].items():
-        if user_data.get("completed") and "ordering" in user_data:
-            ordering = user_data["ordering"]
-            # Convert ordering to ranks (1-indexed)
-            ranks = [0] * n_items
-            for rank, idx in enumerate(ordering, start=1):
-                ranks[idx] = rank
-            user_rankings[username] = ranks
-
-    if not user_rankings:
+    # Collect all user orderings
+    user_orderings = {
+        username: user_data["ordering"]
+        for username, user_data in session["users"].items()
+        if user_data.get("completed") and "ordering" in user_data
+    }
+
+    if not user_orderings:
         return df
 
-    # Add individual user rank columns
-    for username, ranks in user_rankings.items():
-        df[f"rank_{username}"] = ranks
+    # One row per user, one column per item
+    ranks = _ranks_from_orderings(list(user_orderings.values()), n_items)
+
+    # Add individual user rank columns in a single concat
+    rank_cols = pd.DataFrame(ranks.T, index=df.index,
+                             columns=[f"rank_{u}" for u in user_orderings])
+    df = pd.concat([df, rank_cols], axis=1)
 
     # Compute average rank
-    rank_cols = [f"rank_{u}" for u in user_rankings.keys()]
-    df["avg_rank"] = df[rank_cols].mean(axis=1)
-    df["rank_std"] = df[rank_cols].std(axis=1)
+    df["avg_rank"] = ranks.mean(axis=0)
+    df["rank_std"] = ranks.std(axis=0, ddof=1) if len(user_orderings) > 1 else np.nan
 
     # Sort by average rank
-    df = df.sort_values("avg_rank")
+    df = df.sort_values("avg_rank", kind="stable")
     df["final_ranking"] = range(1, len(df) + 1)
 
     return df
 
 
-def download_session_results(session: Dict) -> bytes:
+_SHEET_NAME_FORBIDDEN = str.maketrans("", "", "[]:*?/\\")
+
+
+def _unique_sheet_name(name: str, taken: set) -> str:
+    """Excel-safe sheet name (no []:*?/\\, at most 31 chars), suffixed _2, _3, ... if already in taken.
+
+    Excel compares sheet names case-insensitively, so taken holds lower-cased names; the result is added to it.
+    """
+    base = name.translate(_SHEET_NAME_FORBIDDEN)[:31]
+    candidate, n = base, 1
+    while candidate.lower() in taken:
+        n += 1
+        suffix = f"_{n}"
+        candidate = base[:31 - len(suffix)] + suffix
+    taken.add(candidate.lower())
+    return candidate
+
+
+def _write_sheet(book: "xlsxwriter.Workbook", name: str, df: pd.DataFrame, header_fmt):
+    """Write a DataFrame to a new worksheet row by row (missing values are left blank)."""
+    ws = book.add_worksheet(name)
+    ws.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+    values = df.astype(object).where(df.notna(), None)
+    for r, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        ws.write_row(r, 0, row)
+
+
+def download_session_results(session: Dict, items_df: Optional[pd.DataFrame] = None) -> bytes:
     """Generate Excel file with individual and average rankings."""
-    df = compute_average_ranking(session)
+    # Built once and shared by every user sheet
+    if items_df is None:
+        items_df = pd.DataFrame(session["data"])
+    df = compute_average_ranking(session, items_df)
+    n_items = len(items_df)
 
+    import xlsxwriter  # Only needed for exports
+
+    # Rows are streamed straight to the workbook, which constant_memory requires
+    # (pandas' to_excel writes column by column)
     buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-        # Sheet 1: Combined results
-        df.to_excel(writer, sheet_name="Combined Rankings", index=False)
-
-        # Sheet 2: Individual user results
-        cols = session["columns"]
-        for username, user_data in session["users"].items():
-            if user_data.get("completed") and "ordering" in user_data:
-                user_df = pd.DataFrame(session["data"])
-                ordering = user_data["ordering"]
-                ranks = [0] * len(user_df)
-                for rank, idx in enumerate(ordering, start=1):
-                    ranks[idx] = rank
-                user_df["ranking"] = ranks
-                user_df = user_df.sort_values("ranking")
-                user_df.to_excel(writer, sheet_name=f"User_{username[:20]}", index=False)
+    book = xlsxwriter.Workbook(buf, {"constant_memory": True, "strings_to_urls": False})
+    header_fmt = book.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+
+    # Sheet 1: Combined results
+    taken = set()
+    _write_sheet(book, _unique_sheet_name("Combined Rankings", taken), df, header_fmt)
 
+    # Sheet 2: Individual user results
+    for username, user_data in session["users"].items():
+        if user_data.get("completed") and "ordering" in user_data:
+            ranks = _ranks_from_orderings([user_data["ordering"]], n_items)[0]
+            user_df = items_df.assign(ranking=ranks).sort_values("ranking", kind="stable")
+            _write_sheet(book, _unique_sheet_name(f"User_{username}", taken), user_df, header_fmt)
+
+    book.close()
     return buf.getvalue()
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _session_results_df(session_id: str, signature: Tuple[int, int]) -> pd.DataFrame:
+    """compute_average_ranking() for a stored session, cached until the session or a result changes."""
+    return compute_average_ranking(load_session(session_id), load_items_df(session_id))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _session_results_xlsx(session_id: str, signature: Tuple[int, int]) -> bytes:
+    """download_session_results() for a stored session, cached until the session or a result changes."""
+    return download_session_results(load_session(session_id), load_items_df(session_id))
+
+
 # --- Page Configuration ---
 st.set_page_config(page_title=APP_TITLE, page_icon=APP_ICON, layout="wide")
 st.title(f"{APP_ICON} {APP_TITLE}")
@@ -228,10 +420,13 @@ def init_state():
     ss.setdefault("id_col", None)
     ss.setdefault("name_col", None)
     ss.setdefault("desc_col", None)
+    ss.setdefault("df_source", None)  # upload file_id or session id ss.df was loaded from; keys card_cache
+    ss.setdefault("card_cache", None)  # built by _card_cache()
 
     # Global mode
     ss.setdefault("rating_strategy", STRATEGY_BINARY)
     ss.setdefault("in_rating_mode", False)
+    ss.setdefault("rng_seed", None)  # Drawn when rating starts; seeds item order / pairings
 
     # Binary state
     ss.setdefault("binary_order", [])
@@ -246,11 +441,11 @@ def init_state():
     # Elo state
     ss.setdefault("elo_pairs", [])
     ss.setdefault("elo_idx", 0)
-    ss.setdefault("elo_ratings", {})
+    ss.setdefault("elo_ratings", np.zeros(0))  # rating per item position
     ss.setdefault("elo_done", False)
 
     # Swiss state
-    ss.setdefault("swiss_points", {})
+    ss.setdefault("swiss_points", np.zeros(0, dtype=np.int32))  # points per item position
     ss.setdefault("swiss_round", 1)
     ss.setdefault("swiss_rounds_total", 3)
     ss.setdefault("swiss_pairs", [])
@@ -296,10 +491,10 @@ def reset_rating_state():
     # Elo state
     ss.elo_pairs = []
     ss.elo_idx = 0
-    ss.elo_ratings = {}
+    ss.elo_ratings = np.zeros(0)
     ss.elo_done = False
     # Swiss state
-    ss.swiss_points = {}
+    ss.swiss_points = np.zeros(0, dtype=np.int32)
     ss.swiss_round = 1
     ss.swiss_pairs = []
     ss.swiss_idx = 0
@@ -315,6 +510,8 @@ def go_home():
     ss.current_session_id = None
     ss.current_user = None
     ss.df = None
+    ss.df_source = None
+    ss.card_cache = None
 
 
 def get_n_items() -> int:
@@ -324,41 +521,72 @@ def get_n_items() -> int:
     return len(ss.df)
 
 
+def _card_cache() -> Tuple:
+    """(source, columns, column lists, card markdown), rebuilt when the items or mapping change.
+
+    Keyed on ss.df_source rather than the DataFrame object, which is a new one each time it is loaded.
+    """
+    cols = (ss.id_col, ss.name_col, ss.desc_col)
+    cache = ss.get("card_cache")
+    if cache is None or cache[0] != ss.df_source or cache[1] != cols:
+        ids, names, descs = lists = tuple(ss.df[c].tolist() for c in cols)
+        md = [f"**{i} — {n}**\n\n{d}" for i, n, d in zip(ids, names, descs)]
+        cache = (ss.df_source, cols, lists, md)
+        ss.card_cache = cache
+    return cache
+
+
+def _card_columns() -> Tuple[List, List, List]:
+    """ID, name and description columns as plain lists."""
+    return _card_cache()[2]
+
+
+def card_markdown(idx: int, title: str) -> str:
+    """Whole card (title, id — name, description) as one markdown block."""
+    return f"#### {title}\n{_card_cache()[3][idx]}"
+
+
 def get_card(idx: int) -> Dict:
     """Get item info by index."""
-    row = ss.df.iloc[idx]
+    ids, names, descs = _card_columns()
     return {
-        "id": row[ss.id_col],
-        "name": row[ss.name_col],
-        "desc": row[ss.desc_col],
+        "id": ids[idx],
+        "name": names[idx],
+        "desc": descs[idx],
     }
 
 
 def build_ranked_df(ordering: List[int]) -> pd.DataFrame:
     """Build DataFrame with ranking column."""
-    ranks = [None] * len(ss.df)
-    for rank, idx in enumerate(ordering, start=1):
-        ranks[idx] = rank
-    out = ss.df.copy()
-    out["ranking"] = ranks
-    return out.sort_values(by="ranking")
+    # The ordering already lists rows best first, so taking them in that order is the sort
+    return ss.df.iloc[ordering].assign(ranking=np.arange(1, len(ordering) + 1))
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
 def download_excel(df: pd.DataFrame) -> bytes:
-    """Convert DataFrame to Excel bytes."""
+    """Convert DataFrame to Excel bytes (cached, since download clicks rerun the page)."""
     buf = io.BytesIO()
     with pd.ExcelWriter(buf, engine="xlsxwriter") as w:
         df.to_excel(w, index=False)
     return buf.getvalue()
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def download_csv(df: pd.DataFrame) -> bytes:
+    """Convert DataFrame to CSV bytes."""
+    return df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
 def generate_session_qr(session_id: str) -> bytes:
     """Generate a QR code image with URL for joining a session."""
+    import qrcode  # Pulls in PIL; only needed once a session is shared
+
     session_url = f"{APP_URL}/?session={session_id}"
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
+        box_size=8,
         border=4,
     )
     qr.add_data(session_url)
@@ -376,8 +604,9 @@ def binary_start():
     if n == 0:
         return
 
+    ss.rng_seed = random.randrange(2**32)
     order = list(range(n))
-    random.shuffle(order)
+    random.Random(ss.rng_seed).shuffle(order)
 
     # First item goes directly to sorted list
     ss.binary_order = order
@@ -407,11 +636,15 @@ def binary_setup_next():
     ss.binary_candidate = candidate
     ss.binary_low = 0
     ss.binary_high = n_sorted - 1
-    ss.binary_mid = (0 + n_sorted - 1) // 2
+    ss.binary_mid = (n_sorted - 1) // 2
 
 
 def binary_get_pair() -> Optional[Tuple[int, int]]:
-    """Get current pair to compare."""
+    """Get current pair to compare.
+
+    Every pair is new: the candidate is only ever probed against items already placed, and the
+    search window excludes anything a previous answer already ordered it against.
+    """
     if ss.binary_candidate is None:
         binary_setup_next()
 
@@ -425,24 +658,20 @@ def binary_record(left_wins: bool):
     """Record comparison result."""
     ss.binary_comparisons += 1
 
+    low, high, mid = ss.binary_low, ss.binary_high, ss.binary_mid
     if left_wins:
-        ss.binary_high = ss.binary_mid - 1
+        high = mid - 1
     else:
-        ss.binary_low = ss.binary_mid + 1
+        low = mid + 1
 
-    if ss.binary_low > ss.binary_high:
-        # Found position
-        sorted_list = list(ss.binary_sorted)
-        sorted_list.insert(ss.binary_low, ss.binary_candidate)
-        ss.binary_sorted = sorted_list
+    if low > high:
+        # Found position - insert in place (session_state keeps the same list object)
+        ss.binary_sorted.insert(low, ss.binary_candidate)
         ss.binary_i += 1
-        ss.binary_candidate = None
-        ss.binary_low = None
-        ss.binary_high = None
-        ss.binary_mid = None
-        binary_setup_next()
+        binary_setup_next()  # Sets the next candidate and bounds, or clears the candidate when done
     else:
-        ss.binary_mid = (ss.binary_low + ss.binary_high) // 2
+        ss.binary_low, ss.binary_high = low, high
+        ss.binary_mid = (low + high) // 2
 
 
 def binary_is_done() -> bool:
@@ -451,6 +680,18 @@ def binary_is_done() -> bool:
 
 
 # --- Elo Strategy ---
+def build_elo_pairs(n: int, total: int, seed: int) -> List[Tuple[int, int]]:
+    """Draw total random matches between n items; the same seed always gives the same schedule."""
+    if n < 2:
+        return []
+    # Draw all matches at once; shifting b past a guarantees a != b without rejection
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, n, size=total, dtype=np.int32)
+    b = rng.integers(0, n - 1, size=total, dtype=np.int32)
+    b += b >= a
+    return list(zip(a.tolist(), b.tolist()))
+
+
 def elo_start():
     """Initialize Elo tournament."""
     n = get_n_items()
@@ -460,14 +701,10 @@ def elo_start():
     games_per = ss.get("elo_games_per_idea", 5)
     total = max(n * games_per // 2, n - 1)
 
-    pairs = []
-    while len(pairs) < total:
-        i, j = random.sample(range(n), 2)
-        pairs.append((i, j))
-
-    ss.elo_pairs = pairs
+    ss.rng_seed = random.randrange(2**32)
+    ss.elo_pairs = build_elo_pairs(n, total, ss.rng_seed)
     ss.elo_idx = 0
-    ss.elo_ratings = {i: 1500.0 for i in range(n)}
+    ss.elo_ratings = np.full(n, 1500.0)
     ss.elo_done = False
     ss.in_rating_mode = True
 
@@ -479,41 +716,51 @@ def elo_get_pair() -> Optional[Tuple[int, int]]:
     return ss.elo_pairs[ss.elo_idx]
 
 
-def elo_record(left_wins: bool):
-    """Record Elo result."""
-    if ss.elo_done:
+def elo_record_batch(left_wins: List[bool]):
+    """Record the results of the next len(left_wins) Elo matches in one update.
+
+    Expected scores are all taken from the ratings before the batch (a rating period), so the
+    whole batch is one vectorized pass instead of a Python update per match.
+    """
+    if ss.elo_done or not left_wins:
         return
 
-    i, j = ss.elo_pairs[ss.elo_idx]
-    winner = i if left_wins else j
+    pairs, ratings, idx = ss.elo_pairs, ss.elo_ratings, ss.elo_idx
+    batch = np.asarray(pairs[idx:idx + len(left_wins)], dtype=np.intp).reshape(-1, 2)
+    i, j = batch[:, 0], batch[:, 1]
+    score = np.asarray(left_wins[:len(batch)], dtype=np.float64)  # 1 = left won
 
-    # Elo update
-    ra, rb = ss.elo_ratings[i], ss.elo_ratings[j]
-    qa = 10 ** (ra / 400)
-    qb = 10 ** (rb / 400)
-    ea = qa / (qa + qb)
-    eb = qb / (qa + qb)
-    k = 32
-
-    if winner == i:
-        ss.elo_ratings[i] = ra + k * (1 - ea)
-        ss.elo_ratings[j] = rb + k * (0 - eb)
-    else:
-        ss.elo_ratings[i] = ra + k * (0 - ea)
-        ss.elo_ratings[j] = rb + k * (1 - eb)
+    # Logistic form of the Elo expected score; the right item's change mirrors the left's
+    ea = 1.0 / (1.0 + np.exp((ratings[j] - ratings[i]) * _LN10_OVER_400))
+    delta = ELO_K * (score - ea)
+
+    # add.at accumulates when an item plays several matches in the batch; updates happen in place
+    np.add.at(ratings, i, delta)
+    np.add.at(ratings, j, -delta)
 
-    ss.elo_idx += 1
-    if ss.elo_idx >= len(ss.elo_pairs):
+    idx += len(batch)
+    ss.elo_idx = idx
+    if idx >= len(pairs):
         ss.elo_done = True
 
 
+def elo_submit_form(batch: range):
+    """Form callback: record the radio picks for matches in batch, if every match was answered."""
+    picks = [ss.get(f"elo_pick_{m}") for m in batch]
+    if None in picks:
+        st.toast("Pick the idea with more impact in every match.")
+        return
+    elo_record_batch([pick == "left" for pick in picks])
+
+
 def elo_finish():
     ss.elo_done = True
 
 
 def elo_ordering() -> List[int]:
     """Get Elo ordering."""
-    return sorted(ss.elo_ratings.keys(), key=lambda i: ss.elo_ratings[i], reverse=True)
+    # Stable, so equal ratings keep item order
+    return np.argsort(-ss.elo_ratings, kind="stable").tolist()
 
 
 # --- Swiss Strategy ---
@@ -523,7 +770,8 @@ def swiss_start():
     if n == 0:
         return
 
-    ss.swiss_points = {i: 0 for i in range(n)}
+    ss.rng_seed = random.randrange(2**32)
+    ss.swiss_points = np.zeros(n, dtype=np.int32)
     ss.swiss_round = 1
     ss.swiss_idx = 0
     ss.swiss_done = False
@@ -534,19 +782,15 @@ def swiss_start():
 def swiss_build_pairs():
     """Build pairs for current round."""
     n = get_n_items()
-    indices = list(range(n))
-    random.shuffle(indices)
-    indices.sort(key=lambda i: ss.swiss_points[i], reverse=True)
+    # Highest points first, random order among equal points (drawn per round from the start seed)
+    tiebreak = np.random.default_rng([ss.rng_seed, ss.swiss_round]).random(n)
+    indices = np.lexsort((tiebreak, -ss.swiss_points)).tolist()
 
-    pairs = []
-    i = 0
-    while i < n - 1:
-        pairs.append((indices[i], indices[i + 1]))
-        i += 2
+    pairs = list(zip(indices[0::2], indices[1::2]))
 
     # Bye for odd number
-    if i == n - 1:
-        ss.swiss_points[indices[i]] += 1
+    if n % 2 == 1:
+        ss.swiss_points[indices[-1]] += 1
 
     ss.swiss_pairs = pairs
     ss.swiss_idx = 0
@@ -576,12 +820,14 @@ def swiss_record(left_wins: bool):
     if ss.swiss_done:
         return
 
-    i, j = ss.swiss_pairs[ss.swiss_idx]
+    pairs, idx = ss.swiss_pairs, ss.swiss_idx
+    i, j = pairs[idx]
     winner = i if left_wins else j
     ss.swiss_points[winner] += 1
-    ss.swiss_idx += 1
+    idx += 1
+    ss.swiss_idx = idx
 
-    if ss.swiss_idx >= len(ss.swiss_pairs):
+    if idx >= len(pairs):
         if ss.swiss_round >= ss.swiss_rounds_total:
             ss.swiss_done = True
 
@@ -592,17 +838,19 @@ def swiss_finish():
 
 def swiss_ordering() -> List[int]:
     """Get Swiss ordering."""
-    return sorted(ss.swiss_points.keys(), key=lambda i: (ss.swiss_points[i], -i), reverse=True)
+    # Stable, so equal points keep item order
+    return np.argsort(-ss.swiss_points, kind="stable").tolist()
 
 
 # --- Helper: Load session data into state ---
 def load_session_into_state(session_id: str) -> bool:
     """Load a session's data into session_state for rating."""
-    session = load_session(session_id)
+    session = get_session(session_id)
     if session is None:
         return False
 
-    ss.df = pd.DataFrame(session["data"])
+    ss.df = load_items_df(session_id)
+    ss.df_source = session_id
     ss.id_col = session["columns"]["id"]
     ss.name_col = session["columns"]["name"]
     ss.desc_col = session["columns"]["desc"]
@@ -629,10 +877,10 @@ def finish_session_rating():
         extra = {"comparisons": ss.binary_comparisons}
     elif ss.rating_strategy == STRATEGY_ELO:
         ordering = elo_ordering()
-        extra = {"elo_ratings": dict(ss.elo_ratings)}
+        extra = {"elo_ratings": ss.elo_ratings.tolist()}
     elif ss.rating_strategy == STRATEGY_SWISS:
         ordering = swiss_ordering()
-        extra = {"swiss_points": dict(ss.swiss_points)}
+        extra = {"swiss_points": ss.swiss_points.tolist()}
     else:
         ordering = []
         extra = {}
@@ -822,7 +1070,7 @@ def render_join_session_view():
     selected_id = session_names[selected_name]
 
     # Show session info
-    session = load_session(selected_id)
+    session = get_session(selected_id)
     if session:
         st.info(f"**Items to rank:** {len(session['data'])} | "
                 f"**Strategy:** {STRATEGY_LABELS.get(session['strategy'], session['strategy'])} | "
@@ -874,17 +1122,21 @@ def render_solo_view():
         st.header("1) Upload ideas")
         file = st.file_uploader("Upload Excel/CSV", type=["xlsx", "csv"])
 
-        if file:
+        # Parse the upload once; comparison reruns reuse ss.df (and the card cache keyed on it)
+        if file and file.file_id != ss.df_source:
             try:
                 if file.name.lower().endswith(".csv"):
                     ss.df = pd.read_csv(file)
                 else:
                     ss.df = pd.read_excel(file)
-                st.success(f"Loaded {len(ss.df)} ideas.")
+                ss.df_source = file.file_id
             except Exception as e:
                 st.error(f"Error: {e}")
+        if file and ss.df is not None:
+            st.success(f"Loaded {len(ss.df)} ideas.")
 
-        if ss.df is not None:
+        # Mapping and strategy are fixed once rating starts, so skip those widgets on comparison reruns
+        if ss.df is not None and not ss.in_rating_mode:
             cols = list(ss.df.columns)
 
             st.header("2) Map columns")
@@ -904,6 +1156,7 @@ def render_solo_view():
             elif ss.rating_strategy == STRATEGY_SWISS:
                 ss.swiss_rounds_total = st.slider("Number of rounds", 2, 10, 3)
 
+        if ss.df is not None:
             st.header("4) Start / reset")
             if not ss.in_rating_mode:
                 if st.button("Start rating mode", type="primary", use_container_width=True):
@@ -918,6 +1171,7 @@ def render_solo_view():
                 if st.button("Reset", use_container_width=True):
                     reset_rating_state()
                     ss.df = None
+                    ss.df_source = None
                     st.rerun()
 
     # Main content for solo mode
@@ -925,12 +1179,11 @@ def render_solo_view():
         st.info("Upload an Excel/CSV file in the sidebar to begin.")
         return
 
-    with st.expander("Preview uploaded data"):
-        st.dataframe(ss.df[[ss.id_col, ss.name_col, ss.desc_col]].head(20), use_container_width=True)
-
-    st.divider()
-
     if not ss.in_rating_mode:
+        with st.expander("Preview uploaded data"):
+            st.dataframe(ss.df[[ss.id_col, ss.name_col, ss.desc_col]].head(20), use_container_width=True)
+
+        st.divider()
         st.warning("Choose a ranking type and click **Start rating mode** in the sidebar.")
         return
 
@@ -943,7 +1196,7 @@ def render_solo_view():
 # =============================================================================
 def render_rating_view():
     """Render the rating interface for session mode."""
-    session = load_session(ss.current_session_id)
+    session = get_session(ss.current_session_id)
     if session is None:
         st.error("Session not found.")
         if st.button("Go Home"):
@@ -969,7 +1222,7 @@ def render_rating_view():
 # =============================================================================
 def render_results_view():
     """Render the results view for a session."""
-    session = load_session(ss.current_session_id)
+    session = get_session(ss.current_session_id)
     if session is None:
         st.error("Session not found.")
         if st.button("Go Home"):
@@ -988,11 +1241,11 @@ def render_results_view():
     # Session info with QR code
     col_metrics, col_qr = st.columns([3, 1])
 
+    completed = sum(1 for u in session["users"].values() if u.get("completed"))
     with col_metrics:
         c1, c2, c3 = st.columns(3)
         c1.metric("Items", len(session["data"]))
         c2.metric("Users Participated", len(session["users"]))
-        completed = len([u for u in session["users"].values() if u.get("completed")])
         c3.metric("Completed", completed)
 
     with col_qr:
@@ -1003,9 +1256,11 @@ def render_results_view():
     # Show user status
     st.markdown("#### Participants")
     if session["users"]:
-        for username, user_data in session["users"].items():
-            status = "Completed" if user_data.get("completed") else "In Progress"
-            st.write(f"- **{username}**: {status}")
+        participants = pd.DataFrame({
+            "User": list(session["users"]),
+            "Status": ["Completed" if u.get("completed") else "In Progress" for u in session["users"].values()],
+        })
+        st.dataframe(participants, hide_index=True, use_container_width=True)
     else:
         st.info("No users have participated yet.")
 
@@ -1014,12 +1269,13 @@ def render_results_view():
     # Show combined results if anyone has completed
     if completed > 0:
         st.markdown("#### Combined Rankings")
-        df = compute_average_ranking(session)
+        signature = _session_signature(ss.current_session_id)
+        df = _session_results_df(ss.current_session_id, signature)
         st.dataframe(df, use_container_width=True, height=400)
 
         st.download_button(
             "Download Results (Excel)",
-            download_session_results(session),
+            _session_results_xlsx(ss.current_session_id, signature),
             f"ranking_{session['name'].replace(' ', '_')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
@@ -1052,7 +1308,9 @@ def render_ranking_ui(is_session: bool = False):
         else:
             st.success("All ideas have a **unique ranking**!")
             st.dataframe(ranked_df, use_container_width=True, height=400)
-            st.download_button("Download Excel", download_excel(ranked_df), "ranking.xlsx")
+            col_xlsx, col_csv = st.columns(2)
+            col_xlsx.download_button("Download Excel", download_excel(ranked_df), "ranking.xlsx")
+            col_csv.download_button("Download CSV", download_csv(ranked_df), "ranking.csv", mime="text/csv")
 
     # --- Binary UI ---
     if ss.rating_strategy == STRATEGY_BINARY:
@@ -1070,33 +1328,24 @@ def render_ranking_ui(is_session: bool = False):
             handle_completion(ss.binary_sorted, ranked)
             return
 
+        # binary_get_pair() sets up the next candidate itself, so None here means nothing is left
         pair = binary_get_pair()
         if pair is None:
-            st.info("Preparing...")
-            st.rerun()
+            st.info("No more comparisons.")
+            return
 
         left_idx, right_idx = pair
-        left = get_card(left_idx)
-        right = get_card(right_idx)
 
         st.markdown("**Choose which idea has MORE impact**")
         col1, col2 = st.columns(2)
 
-        def handle_bin_left():
-            binary_record(left_wins=True)
-
-        def handle_bin_right():
-            binary_record(left_wins=False)
-
         with col1:
-            st.markdown(f"#### Candidate\n**{left['id']} — {left['name']}**")
-            st.write(left["desc"])
-            st.button("This one has more impact", key="bin_left", use_container_width=True, on_click=handle_bin_left)
+            st.markdown(card_markdown(left_idx, "Candidate"))
+            st.button("This one has more impact", key="bin_left", use_container_width=True, on_click=binary_record, args=(True,))
 
         with col2:
-            st.markdown(f"#### Current position\n**{right['id']} — {right['name']}**")
-            st.write(right["desc"])
-            st.button("This one has more impact", key="bin_right", use_container_width=True, on_click=handle_bin_right)
+            st.markdown(card_markdown(right_idx, "Current position"))
+            st.button("This one has more impact", key="bin_right", use_container_width=True, on_click=binary_record, args=(False,))
 
     # --- Elo UI ---
     elif ss.rating_strategy == STRATEGY_ELO:
@@ -1114,7 +1363,7 @@ def render_ranking_ui(is_session: bool = False):
             elo_finish()
             ordering = elo_ordering()
             ranked = build_ranked_df(ordering)
-            ranked["elo_rating"] = [ss.elo_ratings[i] for i in range(len(ss.df))]
+            ranked["elo_rating"] = ss.elo_ratings[ordering]  # ranked rows follow the ordering
             handle_completion(ordering, ranked)
             return
 
@@ -1123,35 +1372,41 @@ def render_ranking_ui(is_session: bool = False):
             st.info("No more matches.")
             return
 
-        left_idx, right_idx = pair
-        left = get_card(left_idx)
-        right = get_card(right_idx)
+        # Several matches per form, so the page reruns once per batch instead of once per click
+        batch = range(ss.elo_idx, min(ss.elo_idx + ELO_BATCH_SIZE, total))
 
         st.markdown("**Which idea has MORE impact?**")
-        col1, col2 = st.columns(2)
+        with st.form(f"elo_form_{batch.start}"):
+            for m in batch:
+                left_idx, right_idx = ss.elo_pairs[m]
+                left = get_card(left_idx)
+                right = get_card(right_idx)
+                col1, col2 = st.columns(2)
 
-        def handle_elo_left():
-            elo_record(left_wins=True)
+                with col1:
+                    st.markdown(card_markdown(left_idx, "Left"))
+                    st.caption(f"Elo: {ss.elo_ratings[left_idx]:.0f}")
 
-        def handle_elo_right():
-            elo_record(left_wins=False)
+                with col2:
+                    st.markdown(card_markdown(right_idx, "Right"))
+                    st.caption(f"Elo: {ss.elo_ratings[right_idx]:.0f}")
 
-        with col1:
-            st.markdown(f"#### Left\n**{left['id']} — {left['name']}**")
-            st.write(left["desc"])
-            st.caption(f"Elo: {ss.elo_ratings[left_idx]:.0f}")
-            st.button("This one has more impact", key="elo_left", use_container_width=True, on_click=handle_elo_left)
+                labels = {"left": f"Left: {left['name']}", "right": f"Right: {right['name']}"}
+                st.radio("More impact", ["left", "right"], index=None, key=f"elo_pick_{m}",
+                         format_func=labels.get, horizontal=True)
+                st.divider()
 
-        with col2:
-            st.markdown(f"#### Right\n**{right['id']} — {right['name']}**")
-            st.write(right["desc"])
-            st.caption(f"Elo: {ss.elo_ratings[right_idx]:.0f}")
-            st.button("This one has more impact", key="elo_right", use_container_width=True, on_click=handle_elo_right)
+            st.form_submit_button("Submit", type="primary", use_container_width=True, on_click=elo_submit_form, args=(batch,))
 
     # --- Swiss UI ---
     elif ss.rating_strategy == STRATEGY_SWISS:
         st.subheader("Swiss rounds (batch-style)")
 
+        # Advance through finished rounds in this pass (a round can be empty when a lone item gets a bye)
+        pair = swiss_get_pair()
+        while pair is None and not ss.swiss_done:
+            pair = swiss_get_pair()
+
         c1, c2, c3 = st.columns(3)
         c1.metric("Ideas total", n_total)
         c2.metric("Current round", ss.swiss_round)
@@ -1163,39 +1418,24 @@ def render_ranking_ui(is_session: bool = False):
             swiss_finish()
             ordering = swiss_ordering()
             ranked = build_ranked_df(ordering)
-            ranked["points"] = [ss.swiss_points[i] for i in range(len(ss.df))]
+            ranked["points"] = ss.swiss_points[ordering]
             handle_completion(ordering, ranked)
             return
 
-        pair = swiss_get_pair()
-        if pair is None:
-            st.info("Processing next round...")
-            st.rerun()
-
         left_idx, right_idx = pair
-        left = get_card(left_idx)
-        right = get_card(right_idx)
 
         st.markdown(f"**Round {ss.swiss_round}/{ss.swiss_rounds_total} — Which has MORE impact?**")
         col1, col2 = st.columns(2)
 
-        def handle_swiss_left():
-            swiss_record(left_wins=True)
-
-        def handle_swiss_right():
-            swiss_record(left_wins=False)
-
         with col1:
-            st.markdown(f"#### Left\n**{left['id']} — {left['name']}**")
-            st.write(left["desc"])
+            st.markdown(card_markdown(left_idx, "Left"))
             st.caption(f"Points: {ss.swiss_points[left_idx]}")
-            st.button("This one has more impact", key="swiss_left", use_container_width=True, on_click=handle_swiss_left)
+            st.button("This one has more impact", key="swiss_left", use_container_width=True, on_click=swiss_record, args=(True,))
 
         with col2:
-            st.markdown(f"#### Right\n**{right['id']} — {right['name']}**")
-            st.write(right["desc"])
+            st.markdown(card_markdown(right_idx, "Right"))
             st.caption(f"Points: {ss.swiss_points[right_idx]}")
-            st.button("This one has more impact", key="swiss_right", use_container_width=True, on_click=handle_swiss_right)
+            st.button("This one has more impact", key="swiss_right", use_container_width=True, on_click=swiss_record, args=(False,))
 
 
 # =============================================================================
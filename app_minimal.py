@@ -3,49 +3,67 @@ Minimal test - hardcoded data, no file upload.
 Run with: streamlit run app_minimal.py
 """
 
-import random
+from collections import deque
+
+import numpy as np
 import streamlit as st
 
 st.set_page_config(page_title="Minimal Test", layout="wide")
 st.title("Minimal Prioritizer Test")
 
-# Debug output
+# Debug output (only the last 30 lines are ever shown, so older ones are dropped)
 def debug(msg):
     if "debug_log" not in st.session_state:
-        st.session_state.debug_log = []
+        st.session_state.debug_log = deque(maxlen=30)
     st.session_state.debug_log.append(msg)
 
 # Initialize state - AVOID RESERVED NAMES like 'items', 'keys', 'values'
-if "initialized" not in st.session_state:
-    debug("Initializing state...")
-    st.session_state.initialized = True
-    st.session_state.started = False
-    st.session_state.data_list = ["Item A", "Item B", "Item C", "Item D", "Item E"]
-    st.session_state.order_list = []
-    st.session_state.sorted_list = []
-    st.session_state.current_idx = 0
-    st.session_state.candidate_val = None
-    st.session_state.low_val = None
-    st.session_state.high_val = None
-    st.session_state.mid_val = None
-    st.session_state.comparison_count = 0
-    st.session_state.debug_log = []
-    st.session_state.needs_rerun = False  # Flag to handle rerun properly
+# setdefault only fills missing keys, so keys added later are initialized for existing sessions too
+st.session_state.setdefault("debug_log", deque(maxlen=30))
+st.session_state.setdefault("started", False)
+st.session_state.setdefault("data_list", ["Item A", "Item B", "Item C", "Item D", "Item E"])
+st.session_state.setdefault("order_list", [])
+st.session_state.setdefault("sorted_list", [])
+st.session_state.setdefault("current_idx", 0)
+st.session_state.setdefault("candidate_val", None)
+st.session_state.setdefault("low_val", None)
+st.session_state.setdefault("high_val", None)
+st.session_state.setdefault("mid_val", None)
+st.session_state.setdefault("comparison_count", 0)
 
 debug(f"--- Page render ---")
 debug(f"started={st.session_state.started}")
 debug(f"sorted_list={st.session_state.sorted_list}")
 debug(f"current_idx={st.session_state.current_idx}")
-debug(f"needs_rerun={st.session_state.needs_rerun}")
-
-# Handle pending rerun (clear the flag and stop - next render will show updated state)
-if st.session_state.needs_rerun:
-    debug("Clearing needs_rerun flag")
-    st.session_state.needs_rerun = False
-    st.rerun()
 
 n_items = len(st.session_state.data_list)
 
+# START/RESET run as callbacks, so the rerun that follows the click already sees the new state
+def handle_start():
+    debug("START clicked")
+    order = np.random.default_rng().permutation(n_items).tolist()
+    st.session_state.order_list = order
+    st.session_state.sorted_list = [order[0]]
+    st.session_state.current_idx = 1
+    st.session_state.started = True
+    st.session_state.comparison_count = 0
+
+    # Setup first candidate
+    if n_items > 1:
+        st.session_state.candidate_val = order[1]
+        st.session_state.low_val = 0
+        st.session_state.high_val = 0
+        st.session_state.mid_val = 0
+
+    debug(f"After START: sorted_list={st.session_state.sorted_list}, candidate_val={st.session_state.candidate_val}")
+
+def handle_reset():
+    debug("RESET clicked")
+    st.session_state.started = False
+    st.session_state.sorted_list = []
+    st.session_state.current_idx = 0
+    st.session_state.candidate_val = None
+
 # Sidebar
 with st.sidebar:
     st.header("State")
@@ -59,35 +77,9 @@ with st.sidebar:
     st.divider()
 
     if not st.session_state.started:
-        if st.button("START", type="primary"):
-            debug("START clicked")
-            order = list(range(n_items))
-            random.shuffle(order)
-            st.session_state.order_list = order
-            st.session_state.sorted_list = [order[0]]
-            st.session_state.current_idx = 1
-            st.session_state.started = True
-            st.session_state.comparison_count = 0
-
-            # Setup first candidate
-            if n_items > 1:
-                st.session_state.candidate_val = order[1]
-                st.session_state.low_val = 0
-                st.session_state.high_val = 0
-                st.session_state.mid_val = 0
-
-            debug(f"After START: sorted_list={st.session_state.sorted_list}, candidate_val={st.session_state.candidate_val}")
-            st.session_state.needs_rerun = True
-            st.rerun()
+        st.button("START", key="start", type="primary", on_click=handle_start)
     else:
-        if st.button("RESET"):
-            debug("RESET clicked")
-            st.session_state.started = False
-            st.session_state.sorted_list = []
-            st.session_state.current_idx = 0
-            st.session_state.candidate_val = None
-            st.session_state.needs_rerun = True
-            st.rerun()
+        st.button("RESET", key="reset", on_click=handle_reset)
 
 # Main area
 st.divider()
@@ -105,34 +97,6 @@ if is_done:
     st.balloons()
     st.stop()
 
-# Get current pair
-candidate = st.session_state.candidate_val
-mid = st.session_state.mid_val
-
-debug(f"candidate={candidate}, mid={mid}")
-
-if candidate is None or mid is None:
-    st.warning("No candidate - setting up next...")
-    if st.session_state.current_idx < len(st.session_state.order_list):
-        st.session_state.candidate_val = st.session_state.order_list[st.session_state.current_idx]
-        n_sorted = len(st.session_state.sorted_list)
-        st.session_state.low_val = 0
-        st.session_state.high_val = n_sorted - 1
-        st.session_state.mid_val = (n_sorted - 1) // 2
-        st.session_state.needs_rerun = True
-        st.rerun()
-    else:
-        st.error("Something is wrong")
-        st.stop()
-
-left_idx = candidate
-right_idx = st.session_state.sorted_list[mid]
-
-st.subheader("Which is better?")
-st.write(f"Comparing index {left_idx} vs index {right_idx}")
-
-col1, col2 = st.columns(2)
-
 # Use callbacks instead of checking button return value
 def handle_left_click():
     debug("LEFT callback triggered")
@@ -145,58 +109,109 @@ def handle_right_click():
 def process_comparison(left_wins):
     debug(f"Processing comparison: left_wins={left_wins}")
 
-    st.session_state.comparison_count += 1
+    # One proxy lookup for session_state; the body reads and writes through the local
+    ss = st.session_state
+    ss.comparison_count += 1
 
+    # Narrow the search window in locals; session_state is written once below
+    low, high, mid = ss.low_val, ss.high_val, ss.mid_val
     if left_wins:
-        st.session_state.high_val = st.session_state.mid_val - 1
+        high = mid - 1
     else:
-        st.session_state.low_val = st.session_state.mid_val + 1
+        low = mid + 1
 
-    debug(f"After update: low={st.session_state.low_val}, high={st.session_state.high_val}")
+    debug(f"After update: low={low}, high={high}")
 
-    if st.session_state.low_val > st.session_state.high_val:
+    if low > high:
         # Found position - insert
-        debug(f"Inserting {st.session_state.candidate_val} at position {st.session_state.low_val}")
-        new_sorted = list(st.session_state.sorted_list)
-        new_sorted.insert(st.session_state.low_val, st.session_state.candidate_val)
-        st.session_state.sorted_list = new_sorted
-        st.session_state.current_idx += 1
+        debug(f"Inserting {ss.candidate_val} at position {low}")
+        # Insert in place; START always builds a fresh list, so nothing else holds this one
+        sorted_list = ss.sorted_list
+        sorted_list.insert(low, ss.candidate_val)
+        ss.current_idx += 1
+        n_sorted = len(sorted_list)
 
-        debug(f"New sorted_list: {st.session_state.sorted_list}, new current_idx: {st.session_state.current_idx}")
+        debug(f"New sorted_list: {sorted_list}, new current_idx: {ss.current_idx}")
 
         # Setup next candidate
-        if st.session_state.current_idx < len(st.session_state.order_list):
-            next_candidate = st.session_state.order_list[st.session_state.current_idx]
-            n_sorted = len(st.session_state.sorted_list)
-            st.session_state.candidate_val = next_candidate
-            st.session_state.low_val = 0
-            st.session_state.high_val = n_sorted - 1
-            st.session_state.mid_val = (n_sorted - 1) // 2
-            debug(f"Next candidate: {next_candidate}, low=0, high={n_sorted-1}, mid={(n_sorted-1)//2}")
+        if ss.current_idx < len(ss.order_list):
+            next_candidate = ss.order_list[ss.current_idx]
+            mid = (n_sorted - 1) // 2
+            ss.candidate_val = next_candidate
+            ss.low_val = 0
+            ss.high_val = n_sorted - 1
+            ss.mid_val = mid
+            debug(f"Next candidate: {next_candidate}, low=0, high={n_sorted-1}, mid={mid}")
         else:
-            st.session_state.candidate_val = None
-            st.session_state.low_val = None
-            st.session_state.high_val = None
-            st.session_state.mid_val = None
+            ss.candidate_val = None
+            ss.low_val = None
+            ss.high_val = None
+            ss.mid_val = None
             debug("No more candidates")
     else:
-        st.session_state.mid_val = (st.session_state.low_val + st.session_state.high_val) // 2
-        debug(f"Continue search, new mid={st.session_state.mid_val}")
+        ss.low_val = low
+        ss.high_val = high
+        ss.mid_val = (low + high) // 2
+        debug(f"Continue search, new mid={ss.mid_val}")
+
+# The sidebar and debug log below only refresh on full reruns (START/RESET, or finishing)
+@st.fragment
+def comparison_fragment():
+    """Current pair and LEFT/RIGHT buttons; a click reruns only this function, not the whole script."""
+    ss = st.session_state
+    sorted_list = ss.sorted_list
+    n_sorted = len(sorted_list)
+    if n_sorted == n_items:
+        # The last comparison was answered in a fragment rerun - rerun the app to show the result
+        st.rerun()
 
-with col1:
-    st.markdown(f"### {st.session_state.data_list[left_idx]}")
-    st.caption(f"(index {left_idx})")
-    st.button("Choose LEFT", key="left", use_container_width=True, on_click=handle_left_click)
+    # Get current pair
+    candidate = ss.candidate_val
+    mid = ss.mid_val
+
+    debug(f"candidate={candidate}, mid={mid}")
+
+    if candidate is None or mid is None:
+        # Set up the next candidate and keep rendering in this pass
+        if ss.current_idx < len(ss.order_list):
+            candidate = ss.order_list[ss.current_idx]
+            mid = (n_sorted - 1) // 2
+            ss.candidate_val = candidate
+            ss.low_val = 0
+            ss.high_val = n_sorted - 1
+            ss.mid_val = mid
+        else:
+            st.error("Something is wrong")
+            return
 
-with col2:
-    st.markdown(f"### {st.session_state.data_list[right_idx]}")
-    st.caption(f"(index {right_idx})")
-    st.button("Choose RIGHT", key="right", use_container_width=True, on_click=handle_right_click)
+    left_idx = candidate
+    right_idx = sorted_list[mid]
 
-# Show debug log
-st.divider()
-st.subheader("Debug Log (last 30)")
-if st.session_state.debug_log:
-    st.code("\n".join(st.session_state.debug_log[-30:]))
+    st.subheader("Which is better?")
+    st.write(f"Comparing index {left_idx} vs index {right_idx}")
+
+    # Any inputs added to this form (rating sliders, notes) only rerun the app on submit.
+    # The submit buttons keep their callbacks, so the next pair is ready in the same pass.
+    with st.form("compare", clear_on_submit=True, border=False):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown(f"### {ss.data_list[left_idx]}")
+            st.caption(f"(index {left_idx})")
+            st.form_submit_button("Choose LEFT", key="left", use_container_width=True, on_click=handle_left_click)
+
+        with col2:
+            st.markdown(f"### {ss.data_list[right_idx]}")
+            st.caption(f"(index {right_idx})")
+            st.form_submit_button("Choose RIGHT", key="right", use_container_width=True, on_click=handle_right_click)
 
-st.caption(f"Progress: {len(st.session_state.sorted_list)}/{n_items}")
+    st.caption(f"Progress: {n_sorted}/{n_items}")
+
+
+comparison_fragment()
+
+# Show debug log (refreshed on full reruns only)
+st.divider()
+with st.expander("Debug Log (last 30)"):
+    if st.session_state.debug_log:
+        st.code("\n".join(st.session_state.debug_log))
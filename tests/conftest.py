@@ -0,0 +1,7 @@
+"""
+Shared pytest configuration for the test suite.
+"""
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: runs app.py through Streamlit's AppTest (deselect with -m \"not slow\")")
@@ -0,0 +1,47 @@
+"""
+Stand-in for the uploaded DataFrame, for tests that drive the strategies without pandas.
+Columns are id/name/desc; row i is (i, "Item i", "Description i").
+"""
+
+import numpy as np
+
+
+class MockDF:
+    def __init__(self, n):
+        self._n = n
+        # One array per column, built once; rows are read straight out of them
+        self._ids = np.arange(n)
+        self._names = np.array([f"Item {i}" for i in range(n)], dtype=object)
+        self._descs = np.array([f"Description {i}" for i in range(n)], dtype=object)
+        self.columns = ['id', 'name', 'desc']
+
+    def __len__(self):
+        return self._n
+
+    def iloc(self, idx):
+        return _RowView(self, idx)
+
+
+class _RowView:
+    """Row idx of a MockDF; reads index the column arrays, nothing is copied."""
+
+    __slots__ = ("_df", "_i")
+
+    def __init__(self, df, idx):
+        self._df = df
+        self._i = idx
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self._df._names[self._i]
+        if key == "id":
+            return int(self._df._ids[self._i])
+        if key == "desc":
+            return self._df._descs[self._i]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
@@ -0,0 +1,134 @@
+"""
+Stand-in for the streamlit module, so app.py can be imported outside `streamlit run`.
+Widgets return their defaults and layout calls do nothing.
+"""
+
+import sys
+
+_MISSING = object()
+
+
+class MockSessionState(dict):
+    """dict with attribute access; a missing key raises AttributeError, as st.session_state does."""
+
+    def __getattr__(self, key):
+        # One dict lookup and no try/except on the hit path
+        value = dict.get(self, key, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(f"No attribute '{key}'")
+        return value
+
+    __setattr__ = dict.__setitem__
+
+
+class MockStreamlit:
+    def __init__(self):
+        self.session_state = MockSessionState()
+        self.query_params = {}
+        self._config = {}
+        self._rerun_requested = False
+
+    def cache_data(self, func=None, **kwargs):
+        # Pass-through: caching is disabled so every call hits the filesystem
+        return func if func is not None else (lambda f: f)
+
+    cache_resource = cache_data
+
+    def set_page_config(self, **kwargs):
+        self._config = kwargs
+
+    def title(self, *args, **kwargs): pass
+    def caption(self, *args, **kwargs): pass
+    def header(self, *args, **kwargs): pass
+    def subheader(self, *args, **kwargs): pass
+    def write(self, *args, **kwargs): pass
+    def markdown(self, *args, **kwargs): pass
+    def info(self, *args, **kwargs): pass
+    def success(self, *args, **kwargs): pass
+    def warning(self, *args, **kwargs): pass
+    def error(self, *args, **kwargs): pass
+    def divider(self, *args, **kwargs): pass
+    def stop(self, *args, **kwargs): pass
+    def rerun(self, *args, **kwargs): self._rerun_requested = True
+    def should_rerun(self):
+        # True once per rerun() call, like the rerun Streamlit would schedule
+        result = self._rerun_requested
+        self._rerun_requested = False
+        return result
+    def balloons(self, *args, **kwargs): pass
+    def columns(self, *args, **kwargs):
+        spec = args[0] if args else 3
+        return [MockColumn() for _ in range(spec if isinstance(spec, int) else len(spec))]
+    def button(self, *args, **kwargs): return False
+    def text_input(self, *args, **kwargs): return ""
+    def selectbox(self, *args, **kwargs): return args[1][0] if len(args) > 1 and args[1] else None
+    def radio(self, *args, **kwargs): return args[1][0] if len(args) > 1 and args[1] else None
+    def slider(self, *args, **kwargs): return args[2] if len(args) > 2 else 0
+    def file_uploader(self, *args, **kwargs): return None
+    def download_button(self, *args, **kwargs): return False
+    def dataframe(self, *args, **kwargs): pass
+    def metric(self, *args, **kwargs): pass
+    def progress(self, *args, **kwargs): pass
+    def expander(self, *args, **kwargs): return MockExpander()
+    def container(self, *args, **kwargs): return MockContainer()
+    def sidebar(self): return MockSidebar()
+    def code(self, *args, **kwargs): pass
+
+
+class MockColumn:
+    def __enter__(self): return self
+    def __exit__(self, *args): pass
+    def markdown(self, *args, **kwargs): pass
+    def write(self, *args, **kwargs): pass
+    def metric(self, *args, **kwargs): pass
+    def button(self, *args, **kwargs): return False
+
+
+class MockExpander:
+    def __enter__(self): return self
+    def __exit__(self, *args): pass
+    def dataframe(self, *args, **kwargs): pass
+    def code(self, *args, **kwargs): pass
+
+
+class MockContainer:
+    def __enter__(self): return self
+    def __exit__(self, *args): pass
+
+
+class MockSidebar:
+    def __enter__(self): return self
+    def __exit__(self, *args): pass
+    def header(self, *args, **kwargs): pass
+    def button(self, *args, **kwargs): return False
+    def divider(self, *args, **kwargs): pass
+    def file_uploader(self, *args, **kwargs): return None
+    def selectbox(self, *args, **kwargs): return None
+    def radio(self, *args, **kwargs): return None
+    def slider(self, *args, **kwargs): return 0
+    def success(self, *args, **kwargs): pass
+    def error(self, *args, **kwargs): pass
+
+
+def install_mock_streamlit():
+    """Put a fresh MockStreamlit in sys.modules['streamlit'] and return it; call before importing app."""
+    mock_st = MockStreamlit()
+    sys.modules['streamlit'] = mock_st
+    return mock_st
+
+
+def import_app():
+    """Import app.py against a fresh MockStreamlit, then put back whatever sys.modules['streamlit'] held.
+
+    app keeps its reference to the mock, while AppTest tests later in the same pytest run still get real streamlit.
+    """
+    previous = sys.modules.get('streamlit')
+    install_mock_streamlit()
+    try:
+        import app
+    finally:
+        if previous is None:
+            del sys.modules['streamlit']
+        else:
+            sys.modules['streamlit'] = previous
+    return app
@@ -2,126 +2,23 @@
 Test the simplified app.py logic.
 """
 
+import math
+import os
 import sys
 
+import numpy as np
+import pytest
 
-class MockSessionState(dict):
-    def __getattr__(self, key):
-        try:
-            return self[key]
-        except KeyError:
-            raise AttributeError(key)
-
-    def __setattr__(self, key, value):
-        self[key] = value
-
-    def setdefault(self, key, default):
-        if key not in self:
-            self[key] = default
-        return self[key]
-
-    def get(self, key, default=None):
-        return self[key] if key in self else default
-
-
-class MockSt:
-    def __init__(self):
-        self.session_state = MockSessionState()
-
-    def rerun(self):
-        pass
-
-
-mock_st = MockSt()
-sys.modules['streamlit'] = mock_st
-
-# Now import the functions from app.py by executing the relevant parts
-exec("""
-import random
-from typing import List, Dict, Optional, Tuple
-
-STRATEGY_BINARY = "binary"
-
-def init_state():
-    ss = mock_st.session_state
-    ss.setdefault("df", None)
-    ss.setdefault("in_rating_mode", False)
-    ss.setdefault("binary_order", [])
-    ss.setdefault("binary_sorted", [])
-    ss.setdefault("binary_i", 0)
-    ss.setdefault("binary_low", None)
-    ss.setdefault("binary_high", None)
-    ss.setdefault("binary_mid", None)
-    ss.setdefault("binary_candidate", None)
-    ss.setdefault("binary_comparisons", 0)
-    ss.setdefault("rating_strategy", STRATEGY_BINARY)
-
-init_state()
-ss = mock_st.session_state
-
-def get_n_items():
-    if ss.df is None:
-        return 0
-    return len(ss.df)
-
-def binary_start():
-    n = get_n_items()
-    if n == 0:
-        return
-    order = list(range(n))
-    random.shuffle(order)
-    ss.binary_order = order
-    ss.binary_sorted = [order[0]]
-    ss.binary_i = 1
-    ss.binary_candidate = None
-    ss.binary_low = None
-    ss.binary_high = None
-    ss.binary_mid = None
-    ss.binary_comparisons = 0
-    ss.in_rating_mode = True
-    if n > 1:
-        binary_setup_next()
-
-def binary_setup_next():
-    if ss.binary_i >= len(ss.binary_order):
-        ss.binary_candidate = None
-        return
-    candidate = ss.binary_order[ss.binary_i]
-    n_sorted = len(ss.binary_sorted)
-    ss.binary_candidate = candidate
-    ss.binary_low = 0
-    ss.binary_high = n_sorted - 1
-    ss.binary_mid = (0 + n_sorted - 1) // 2
-
-def binary_get_pair():
-    if ss.binary_candidate is None:
-        binary_setup_next()
-    if ss.binary_candidate is None or ss.binary_mid is None:
-        return None
-    return (ss.binary_candidate, ss.binary_sorted[ss.binary_mid])
-
-def binary_record(left_wins):
-    ss.binary_comparisons += 1
-    if left_wins:
-        ss.binary_high = ss.binary_mid - 1
-    else:
-        ss.binary_low = ss.binary_mid + 1
-    if ss.binary_low > ss.binary_high:
-        sorted_list = list(ss.binary_sorted)
-        sorted_list.insert(ss.binary_low, ss.binary_candidate)
-        ss.binary_sorted = sorted_list
-        ss.binary_i += 1
-        ss.binary_candidate = None
-        ss.binary_low = None
-        ss.binary_high = None
-        ss.binary_mid = None
-        binary_setup_next()
-    else:
-        ss.binary_mid = (ss.binary_low + ss.binary_high) // 2
-
-def binary_is_done():
-    return len(ss.binary_sorted) == get_n_items()
-""")
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import app against the streamlit mock
+from streamlit_mock import import_app
+
+import_app()
+
+# Read state through app's own session_state: under pytest another test module may have imported app first
+from app import binary_get_pair, binary_is_done, binary_record, binary_start, get_n_items, ss
 
 # Create mock DataFrame
 class MockDF:
@@ -135,16 +32,16 @@ print("Testing simplified app.py logic")
 print("="*60)
 
 # Test with 5 items
-mock_st.session_state.df = MockDF(5)
+ss.df = MockDF(5)
 
 print(f"\\n1. n_items = {get_n_items()}")
 print(f"   is_done (before start) = {binary_is_done()}")
 
 print("\\n2. Starting binary sort...")
 binary_start()
-print(f"   in_rating_mode = {mock_st.session_state.in_rating_mode}")
-print(f"   binary_sorted = {mock_st.session_state.binary_sorted}")
-print(f"   binary_candidate = {mock_st.session_state.binary_candidate}")
+print(f"   in_rating_mode = {ss.in_rating_mode}")
+print(f"   binary_sorted = {ss.binary_sorted}")
+print(f"   binary_candidate = {ss.binary_candidate}")
 
 print("\\n3. Getting first pair...")
 pair = binary_get_pair()
@@ -165,15 +62,15 @@ while not binary_is_done() and comparison_count < max_comparisons:
     if pair is None:
         break
     comparison_count += 1
-    print(f"   Comparison {comparison_count}: {pair}, sorted={mock_st.session_state.binary_sorted}")
+    print(f"   Comparison {comparison_count}: {pair}, sorted={ss.binary_sorted}")
     binary_record(left_wins=True)
 
 print(f"\\n5. Final state:")
 print(f"   comparisons = {comparison_count}")
-print(f"   binary_sorted = {mock_st.session_state.binary_sorted}")
+print(f"   binary_sorted = {ss.binary_sorted}")
 print(f"   is_done = {binary_is_done()}")
 
-if binary_is_done() and len(mock_st.session_state.binary_sorted) == 5:
+if binary_is_done() and len(ss.binary_sorted) == 5:
     print("\\n" + "="*60)
     print("TEST PASSED!")
     print("="*60)
@@ -182,3 +79,34 @@ else:
     print("TEST FAILED!")
     print("="*60)
     sys.exit(1)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_binary_random_answers(seed):
+    """Any sequence of answers places every item exactly once within the binary-insertion bound."""
+    rng = np.random.default_rng(seed)
+    n_items = int(rng.integers(2, 33))
+    answers = rng.random(500) < 0.5
+    ss.df = MockDF(n_items)
+    binary_start()
+
+    # Inserting into k sorted items takes at most ceil(log2(k + 1)) comparisons
+    bound = sum(math.ceil(math.log2(k + 1)) for k in range(1, n_items))
+    comparisons = 0
+    for _ in range(bound):
+        if binary_get_pair() is None:
+            break
+        binary_record(left_wins=bool(answers[comparisons]))
+        comparisons += 1
+        if binary_is_done():
+            break
+
+    assert binary_is_done(), f"n={n_items}: not done after {comparisons} comparisons (bound {bound})"
+    assert sorted(ss.binary_sorted) == list(range(n_items))
+    assert ss.binary_comparisons == comparisons
+
+
+if __name__ == "__main__":
+    for seed in range(25):
+        test_binary_random_answers(seed)
+    print("Random-answer checks passed for 25 seeds")
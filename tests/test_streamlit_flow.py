@@ -2,53 +2,32 @@
 Test that simulates Streamlit's rerun flow.
 This mimics what happens when the app.py script runs.
 
-Run with: python test_streamlit_flow.py
+Run with: pytest tests/test_streamlit_flow.py
 """
 
-import sys
+import os
 from typing import Optional, Tuple
 
+import pytest
 
-class MockSessionState(dict):
-    """Mock Streamlit session_state."""
 
-    def __getattr__(self, key):
-        try:
-            return self[key]
-        except KeyError:
-            raise AttributeError(f"No attribute '{key}'")
+# Diagnostic output is off unless PRIORITIZER_TEST_VERBOSE=1 (run pytest with -s to see it)
+VERBOSE = os.environ.get("PRIORITIZER_TEST_VERBOSE") == "1"
 
-    def __setattr__(self, key, value):
-        self[key] = value
 
-    def setdefault(self, key, default):
-        if key not in self:
-            self[key] = default
-        return self[key]
+def _p(*args):
+    if VERBOSE:
+        print(*args)
 
-    def get(self, key, default=None):
-        return self[key] if key in self else default
-
-
-class MockStreamlit:
-    """Mock Streamlit module."""
-
-    def __init__(self):
-        self.session_state = MockSessionState()
-        self._rerun_requested = False
-
-    def rerun(self):
-        self._rerun_requested = True
-
-    def should_rerun(self):
-        result = self._rerun_requested
-        self._rerun_requested = False
-        return result
 
+# The config/state/strategies modules these tests target are not part of this tree; skip until they are,
+# before the streamlit mock goes into sys.modules
+pytest.importorskip("strategies")
 
 # Patch streamlit before imports
-mock_st = MockStreamlit()
-sys.modules['streamlit'] = mock_st
+from df_mock import MockDF
+from streamlit_mock import install_mock_streamlit
+mock_st = install_mock_streamlit()
 
 # Now import
 from config import Strategy, Defaults
@@ -58,23 +37,45 @@ from strategies.elo import EloStrategy
 from strategies.swiss import SwissStrategy
 
 
-def create_mock_df(n: int):
-    """Create a mock DataFrame."""
-    class MockDF:
-        def __init__(self, n):
-            self._n = n
-            self.columns = ['id', 'name', 'desc']
-
-        def __len__(self):
-            return self._n
-
-        def iloc(self, idx):
-            class Row:
-                def __getitem__(self, key):
-                    return f"{key}_{idx}"
-            return Row()
-
-    return MockDF(n)
+# State app.py starts from before rating: column mapping plus the binary strategy keys
+_INITIAL_STATE = {
+    "id_col": "id",
+    "name_col": "name",
+    "desc_col": "desc",
+    "rating_strategy": Strategy.BINARY,
+    "in_rating_mode": False,
+    "binary_order_to_insert": [],
+    "binary_sorted_indices": [],
+    "binary_current_i": 0,
+    "binary_low": None,
+    "binary_high": None,
+    "binary_mid": None,
+    "binary_candidate_idx": None,
+    "binary_comparisons_done": 0,
+}
+
+
+# simulate_app_run() reuses one StateManager and one strategy per rating_strategy until the next reset;
+# session state is global, so a new StateManager per rerun would only redo its init
+_state_manager: Optional[StateManager] = None
+_strategies = {}
+
+
+def _get_state_manager() -> StateManager:
+    global _state_manager
+    if _state_manager is None:
+        _state_manager = StateManager()
+    return _state_manager
+
+
+def reset_session_state(n_items: int = 5):
+    """Clear session state, reload _INITIAL_STATE (lists copied) and install a fresh mock df."""
+    global _state_manager
+    _state_manager = None
+    _strategies.clear()
+    mock_st.session_state.clear()
+    mock_st.session_state.update({k: v.copy() if isinstance(v, list) else v for k, v in _INITIAL_STATE.items()})
+    mock_st.session_state["df"] = MockDF(n_items)
 
 
 def simulate_app_run(click_button: Optional[str] = None):
@@ -84,8 +85,8 @@ def simulate_app_run(click_button: Optional[str] = None):
     """
     # This simulates what app.py does on each run
 
-    # --- Initialize State (happens every run) ---
-    state = StateManager()
+    # --- Initialize State (happens every run; the session-wide manager is reused here) ---
+    state = _get_state_manager()
 
     # Check if we have data
     df = state.df
@@ -127,81 +128,57 @@ def simulate_app_run(click_button: Optional[str] = None):
     }
 
 
+_STRATEGY_MAP = {
+    Strategy.BINARY: BinaryStrategy,
+    Strategy.ELO: EloStrategy,
+    Strategy.SWISS: SwissStrategy,
+}
+
+
 def get_strategy(state):
-    """Get strategy instance."""
-    strategy_map = {
-        Strategy.BINARY: BinaryStrategy,
-        Strategy.ELO: EloStrategy,
-        Strategy.SWISS: SwissStrategy,
-    }
-    strategy_class = strategy_map.get(state.rating_strategy, BinaryStrategy)
-    return strategy_class(state)
+    """Get strategy instance, built once per (state, rating_strategy)."""
+    key = (id(state), state.rating_strategy)
+    strategy = _strategies.get(key)
+    if strategy is None:
+        strategy_class = _STRATEGY_MAP.get(state.rating_strategy, BinaryStrategy)
+        strategy = _strategies[key] = strategy_class(state)
+    return strategy
 
 
 def test_full_binary_flow():
     """Test complete binary strategy flow through simulated app runs."""
-    print("\n" + "="*60)
-    print("TESTING FULL BINARY FLOW (Simulated Streamlit Runs)")
-    print("="*60)
+    _p("\n" + "="*60)
+    _p("TESTING FULL BINARY FLOW (Simulated Streamlit Runs)")
+    _p("="*60)
 
-    # Reset state
-    mock_st.session_state.clear()
+    # Reset state and set up initial data (simulates file upload)
+    reset_session_state()
 
-    # Set up initial data (simulates file upload)
-    mock_st.session_state["df"] = create_mock_df(5)
-    mock_st.session_state["id_col"] = "id"
-    mock_st.session_state["name_col"] = "name"
-    mock_st.session_state["desc_col"] = "desc"
-    mock_st.session_state["rating_strategy"] = Strategy.BINARY
-    mock_st.session_state["in_rating_mode"] = False
-
-    # Initialize other state
-    mock_st.session_state.setdefault("binary_order_to_insert", [])
-    mock_st.session_state.setdefault("binary_sorted_indices", [])
-    mock_st.session_state.setdefault("binary_current_i", 0)
-    mock_st.session_state.setdefault("binary_low", None)
-    mock_st.session_state.setdefault("binary_high", None)
-    mock_st.session_state.setdefault("binary_mid", None)
-    mock_st.session_state.setdefault("binary_candidate_idx", None)
-    mock_st.session_state.setdefault("binary_comparisons_done", 0)
-
-    print("\n1. Initial state (before starting)")
+    _p("\n1. Initial state (before starting)")
     result = simulate_app_run()
-    print(f"   Result: {result}")
+    _p(f"   Result: {result}")
     assert result["status"] == "not_started", f"Expected not_started, got {result}"
 
-    print("\n2. Click 'Start' button")
+    _p("\n2. Click 'Start' button")
     result = simulate_app_run(click_button="start")
-    print(f"   Result: {result}")
-    print(f"   Session state after start:")
-    print(f"      in_rating_mode: {mock_st.session_state.get('in_rating_mode')}")
-    print(f"      binary_sorted_indices: {mock_st.session_state.get('binary_sorted_indices')}")
-    print(f"      binary_current_i: {mock_st.session_state.get('binary_current_i')}")
-    print(f"      binary_candidate_idx: {mock_st.session_state.get('binary_candidate_idx')}")
+    _p(f"   Result: {result}")
+    _p(f"   Session state after start:")
+    _p(f"      in_rating_mode: {mock_st.session_state.get('in_rating_mode')}")
+    _p(f"      binary_sorted_indices: {mock_st.session_state.get('binary_sorted_indices')}")
+    _p(f"      binary_current_i: {mock_st.session_state.get('binary_current_i')}")
+    _p(f"      binary_candidate_idx: {mock_st.session_state.get('binary_candidate_idx')}")
     assert result["status"] == "started", f"Expected started, got {result}"
 
-    print("\n3. After rerun (first comparison)")
+    _p("\n3. After rerun (first comparison)")
     result = simulate_app_run()
-    print(f"   Result: {result}")
+    _p(f"   Result: {result}")
 
-    if result["status"] == "done":
-        print("   ERROR: Strategy thinks it's done after start!")
-        print(f"   binary_sorted_indices: {mock_st.session_state.get('binary_sorted_indices')}")
-        print(f"   n_items check: len={len(mock_st.session_state.get('binary_sorted_indices', []))}")
+    assert result["status"] != "done", \
+        f"Strategy thinks it's done after start: {mock_st.session_state.get('binary_sorted_indices')}"
+    assert result["status"] == "comparing", f"Expected 'comparing', got '{result['status']}'"
 
-        # Debug: Check what is_done sees
-        state = StateManager()
-        strategy = BinaryStrategy(state)
-        print(f"   strategy.n_items: {strategy.n_items}")
-        print(f"   strategy.is_done(): {strategy.is_done()}")
-        return False
-
-    if result["status"] != "comparing":
-        print(f"   ERROR: Expected 'comparing', got '{result['status']}'")
-        return False
-
-    print(f"   Pair to compare: {result['pair']}")
-    print(f"   Progress: {result['progress']}")
+    _p(f"   Pair to compare: {result['pair']}")
+    _p(f"   Progress: {result['progress']}")
 
     # Simulate multiple comparisons
     comparison_count = 0
@@ -209,158 +186,93 @@ def test_full_binary_flow():
 
     while comparison_count < max_comparisons:
         comparison_count += 1
-        print(f"\n4.{comparison_count}. Click 'left' button")
+        _p(f"\n4.{comparison_count}. Click 'left' button")
 
         result = simulate_app_run(click_button="left")
-        print(f"   Result after click: {result}")
+        _p(f"   Result after click: {result}")
 
         # Simulate rerun
         result = simulate_app_run()
-        print(f"   Result after rerun: {result}")
+        _p(f"   Result after rerun: {result}")
 
         if result["status"] == "done":
-            print(f"\n   COMPLETED after {comparison_count} comparisons")
-            print(f"   Final ordering: {result['ordering']}")
+            _p(f"\n   COMPLETED after {comparison_count} comparisons")
+            _p(f"   Final ordering: {result['ordering']}")
             break
 
-        if result["status"] != "comparing":
-            print(f"   ERROR: Unexpected status '{result['status']}'")
-            return False
+        assert result["status"] == "comparing", f"Unexpected status '{result['status']}'"
 
-        print(f"   Next pair: {result['pair']}")
+        _p(f"   Next pair: {result['pair']}")
 
-    success = result["status"] == "done" and len(result.get("ordering", [])) == 5
-    print(f"\n   TEST {'PASSED' if success else 'FAILED'}")
-    return success
+    assert result["status"] == "done"
+    assert len(result["ordering"]) == 5
 
 
 def test_issue_detection():
     """
     Specifically test for the issue: ranking finalized after first click.
     """
-    print("\n" + "="*60)
-    print("TESTING SPECIFIC ISSUE: Ranking finalized after first click")
-    print("="*60)
-
-    # Reset state completely
-    mock_st.session_state.clear()
+    _p("\n" + "="*60)
+    _p("TESTING SPECIFIC ISSUE: Ranking finalized after first click")
+    _p("="*60)
 
-    # Manually set up state as app.py would
-    mock_st.session_state["df"] = create_mock_df(5)
-    mock_st.session_state["id_col"] = "id"
-    mock_st.session_state["name_col"] = "name"
-    mock_st.session_state["desc_col"] = "desc"
-    mock_st.session_state["rating_strategy"] = Strategy.BINARY
-    mock_st.session_state["in_rating_mode"] = False
-
-    # Initialize binary state (this is what StateManager._init_state does)
-    mock_st.session_state["binary_order_to_insert"] = []
-    mock_st.session_state["binary_sorted_indices"] = []
-    mock_st.session_state["binary_current_i"] = 0
-    mock_st.session_state["binary_low"] = None
-    mock_st.session_state["binary_high"] = None
-    mock_st.session_state["binary_mid"] = None
-    mock_st.session_state["binary_candidate_idx"] = None
-    mock_st.session_state["binary_comparisons_done"] = 0
+    # Reset state completely and set it up as app.py / StateManager._init_state would
+    reset_session_state()
 
     # Step 1: Create strategy and start
-    print("\n1. Starting strategy...")
+    _p("\n1. Starting strategy...")
     state = StateManager()
     strategy = BinaryStrategy(state)
 
-    print(f"   Before start: n_items = {strategy.n_items}")
-    print(f"   Before start: is_done = {strategy.is_done()}")
+    _p(f"   Before start: n_items = {strategy.n_items}")
+    _p(f"   Before start: is_done = {strategy.is_done()}")
 
     strategy.start()
 
-    print(f"\n   After start:")
-    print(f"   - in_rating_mode: {mock_st.session_state['in_rating_mode']}")
-    print(f"   - sorted_indices: {mock_st.session_state['binary_sorted_indices']}")
-    print(f"   - current_i: {mock_st.session_state['binary_current_i']}")
-    print(f"   - candidate_idx: {mock_st.session_state['binary_candidate_idx']}")
+    _p(f"\n   After start:")
+    _p(f"   - in_rating_mode: {mock_st.session_state['in_rating_mode']}")
+    _p(f"   - sorted_indices: {mock_st.session_state['binary_sorted_indices']}")
+    _p(f"   - current_i: {mock_st.session_state['binary_current_i']}")
+    _p(f"   - candidate_idx: {mock_st.session_state['binary_candidate_idx']}")
 
     # Step 2: Simulate rerun - create NEW strategy instance (this is what Streamlit does)
-    print("\n2. Simulating rerun (new strategy instance)...")
+    _p("\n2. Simulating rerun (new strategy instance)...")
     state2 = StateManager()
     strategy2 = BinaryStrategy(state2)
 
-    print(f"   n_items: {strategy2.n_items}")
-    print(f"   is_done: {strategy2.is_done()}")
+    _p(f"   n_items: {strategy2.n_items}")
+    _p(f"   is_done: {strategy2.is_done()}")
 
     pair = strategy2.get_current_pair()
-    print(f"   get_current_pair: {pair}")
+    _p(f"   get_current_pair: {pair}")
 
-    if pair is None:
-        print("\n   BUG FOUND: get_current_pair() returns None!")
-        print(f"   Debugging:")
-        print(f"   - binary_candidate_idx: {mock_st.session_state['binary_candidate_idx']}")
-        print(f"   - binary_mid: {mock_st.session_state['binary_mid']}")
-        print(f"   - binary_sorted_indices: {mock_st.session_state['binary_sorted_indices']}")
-        return False
-
-    if strategy2.is_done():
-        print("\n   BUG FOUND: is_done() returns True prematurely!")
-        print(f"   sorted_indices length: {len(mock_st.session_state['binary_sorted_indices'])}")
-        print(f"   n_items: {strategy2.n_items}")
-        return False
+    assert pair is not None, (
+        f"get_current_pair() returns None: candidate_idx={mock_st.session_state['binary_candidate_idx']}, "
+        f"mid={mock_st.session_state['binary_mid']}, sorted={mock_st.session_state['binary_sorted_indices']}"
+    )
+    assert not strategy2.is_done(), "is_done() returns True prematurely"
 
     # Step 3: Record first result
-    print(f"\n3. Recording first comparison result (left wins)...")
+    _p(f"\n3. Recording first comparison result (left wins)...")
     strategy2.record_result(left_wins=True)
 
-    print(f"   After record_result:")
-    print(f"   - sorted_indices: {mock_st.session_state['binary_sorted_indices']}")
-    print(f"   - current_i: {mock_st.session_state['binary_current_i']}")
-    print(f"   - candidate_idx: {mock_st.session_state['binary_candidate_idx']}")
+    _p(f"   After record_result:")
+    _p(f"   - sorted_indices: {mock_st.session_state['binary_sorted_indices']}")
+    _p(f"   - current_i: {mock_st.session_state['binary_current_i']}")
+    _p(f"   - candidate_idx: {mock_st.session_state['binary_candidate_idx']}")
 
     # Step 4: Another rerun
-    print("\n4. Simulating another rerun...")
+    _p("\n4. Simulating another rerun...")
     state3 = StateManager()
     strategy3 = BinaryStrategy(state3)
 
-    print(f"   n_items: {strategy3.n_items}")
-    print(f"   is_done: {strategy3.is_done()}")
+    _p(f"   n_items: {strategy3.n_items}")
+    _p(f"   is_done: {strategy3.is_done()}")
 
-    if strategy3.is_done():
-        print("\n   BUG FOUND: is_done() returns True after just 1 comparison!")
-        print(f"   sorted_indices: {mock_st.session_state['binary_sorted_indices']}")
-        print(f"   expected 5 items, have {len(mock_st.session_state['binary_sorted_indices'])}")
-        return False
+    assert not strategy3.is_done(), \
+        f"is_done() returns True after 1 comparison: {mock_st.session_state['binary_sorted_indices']}"
 
     pair = strategy3.get_current_pair()
-    print(f"   get_current_pair: {pair}")
-
-    if pair is None:
-        print("\n   BUG FOUND: No pair after first comparison!")
-        return False
-
-    print("\n   TEST PASSED: Strategy continues correctly after first comparison")
-    return True
-
-
-if __name__ == "__main__":
-    print("\n" + "#"*60)
-    print("# STREAMLIT FLOW SIMULATION TESTS")
-    print("#"*60)
-
-    results = {}
-    results['issue_detection'] = test_issue_detection()
-    results['full_flow'] = test_full_binary_flow()
-
-    print("\n" + "#"*60)
-    print("# SUMMARY")
-    print("#"*60)
-
-    for name, passed in results.items():
-        status = "PASSED" if passed else "FAILED"
-        print(f"   {name}: {status}")
-
-    all_passed = all(results.values())
-    print("\n" + "#"*60)
-    if all_passed:
-        print("# ALL TESTS PASSED - Bug is likely in Streamlit UI layer")
-    else:
-        print("# TESTS FAILED - Bug found in strategy logic")
-    print("#"*60)
+    _p(f"   get_current_pair: {pair}")
+    assert pair is not None, "No pair after first comparison"
 
-    sys.exit(0 if all_passed else 1)